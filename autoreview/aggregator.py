@@ -1,7 +1,10 @@
 from typing import Any
 
 
-def normalize_line_range(lines: list[int]) -> tuple[int, int]:
+def normalize_line_range(lines: list[int] | int | str) -> tuple[int, int]:
+	# a bare line number ('lines': 5 or '5') is a one-line range, not a sequence of digits
+	if isinstance(lines, (int, str)):
+		return (int(lines), int(lines))
 	if not lines:
 		return (0, 0)
 	if len(lines) == 1:
@@ -9,17 +12,39 @@ def normalize_line_range(lines: list[int]) -> tuple[int, int]:
 	return (int(min(lines[0], lines[1])), int(max(lines[0], lines[1])))
 
 
+def issue_key(it: dict) -> tuple[str, int, int, str] | None:
+	# None when the model's 'lines' can't be read as a line range ('10-12', ['10-12'], [None], ...)
+	try:
+		start, end = normalize_line_range(it.get('lines') or [])
+	except (TypeError, ValueError):
+		return None
+	return (it.get('file') or '', start, end, it.get('rule') or '')
+
+
+def dedupe_findings(issues: list[dict]) -> list[dict]:
+	seen: set[tuple[str, int, int, str]] = set()
+	result: list[dict] = []
+	for it in issues:
+		if not isinstance(it, dict):
+			continue
+		key = issue_key(it)
+		# dedupe_and_group can't report a finding without a line range, so don't pay to filter it
+		if key is None or key in seen:
+			continue
+		seen.add(key)
+		result.append(it)
+	return result
+
+
 def dedupe_and_group(issues: list[dict]) -> list[dict]:
 	seen: set[tuple[str, int, int, str]] = set()
 	result: list[dict] = []
 	for it in issues:
-		file = it.get('file') or ''
-		start, end = normalize_line_range(it.get('lines') or [])
-		rule = it.get('rule') or ''
-		key = (file, start, end, rule)
-		if key in seen:
+		key = issue_key(it) if isinstance(it, dict) else None
+		if key is None or key in seen:
 			continue
 		seen.add(key)
+		file, start, end, rule = key
 		result.append({
 			'file': file,
 			'lines': [start] if start == end else [start, end],
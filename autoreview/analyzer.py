@@ -1,45 +1,123 @@
 import os
 import re
 import glob
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
-def collect_text_samples(root_dir: str, limit_bytes: int = 80000) -> dict:
-	root = Path(root_dir)
+SAMPLE_EXTS = {'md', 'txt', 'py', 'js', 'ts', 'html', 'css'}
+# dependency/VCS trees; other hidden entries (.github, .eslintrc.json, ...) are kept
+SKIP_DIRS = frozenset({'node_modules', '__pycache__', 'venv', '.venv', '.git'})
+
+
+def read_text(path) -> str:
+	# unbuffered FileIO: one fstat-sized read, no BufferedReader/TextIOWrapper layers
+	with open(path, 'rb', buffering=0) as f:
+		text = f.readall().decode('utf-8', errors='ignore')
+	if '\r' in text:
+		text = text.replace('\r\n', '\n').replace('\r', '\n')
+	return text
+
+
+def try_read_text(path) -> str | None:
+	try:
+		return read_text(path)
+	except Exception:
+		return None
+
+
+_RE_META = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
+
+@lru_cache(maxsize=512)
+def _cre(pattern: str) -> re.Pattern:
+	return re.compile(pattern)
+
+
+def walk_files(root_dir: str, rel: str = ''):
+	# depth-first, names sorted per directory: same order as sorted(rglob('*'))
+	try:
+		with os.scandir(os.path.join(root_dir, rel) if rel else root_dir) as it:
+			entries = sorted(it, key=lambda e: e.name)
+	except OSError:
+		return
+	for e in entries:
+		sub = f'{rel}/{e.name}' if rel else e.name
+		if e.is_dir(follow_symlinks=False):
+			if e.name in SKIP_DIRS:
+				continue
+			yield from walk_files(root_dir, sub)
+		elif e.is_file():
+			yield sub, e
+
+
+def file_ext(name: str) -> str:
+	base, dot, ext = name.rpartition('.')
+	return ext.lower() if dot and base else ''
+
+
+def _take_bytes(data: str, budget: int) -> tuple[str, int]:
+	# budget counts UTF-8 bytes (closer to prompt tokens than chars) and a cut lands after a full line
+	if budget <= 0:
+		return '', 0
+	raw = data[:budget].encode('utf-8')
+	if len(raw) <= budget and len(data) <= budget:
+		return data, len(raw)
+	chunk = raw[:budget].decode('utf-8', errors='ignore')
+	nl = chunk.rfind('\n')
+	if nl > 0:
+		chunk = chunk[:nl + 1]
+	return chunk, len(chunk.encode('utf-8'))
+
+
+def scan_project(root_dir: str, limit_bytes: int = 80000, quality_checks: bool = True) -> tuple[dict, list[str]]:
+	# one walk and at most one read per file for both the samples and the quality checks
 	acc = {}
+	issues = []
 	remaining = limit_bytes
-	for p in sorted(root.rglob('*')):
-		if p.is_file() and p.suffix.lower() in {'.md', '.txt', '.py', '.js', '.ts', '.html', '.css'}:
-			try:
-				data = p.read_text(encoding='utf-8', errors='ignore')
-			except Exception:
-				continue
-			if remaining <= 0:
-				break
-			chunk = data[: min(len(data), max(0, remaining))]
-			acc[str(p.relative_to(root))] = chunk
-			remaining -= len(chunk)
-	return acc
+	for rel, e in walk_files(root_dir):
+		if remaining <= 0 and not quality_checks:
+			break
+		ext = file_ext(e.name)
+		want_sample = remaining > 0 and ext in SAMPLE_EXTS
+		want_check = quality_checks and ext == 'py'
+		if not want_sample and not want_check:
+			continue
+		try:
+			data = read_text(e.path)
+		except Exception:
+			continue
+		if want_sample:
+			chunk, used = _take_bytes(data, remaining)
+			if chunk:
+				acc[rel] = chunk
+				remaining -= used
+			elif data:
+				# the budget left is smaller than the next character, so sampling is over
+				remaining = 0
+		if want_check and 'print(' in data and 'if __name__' not in data:
+			issues.append(f'Possible stray prints in {e.name}')
+	return acc, issues
+
+
+def collect_text_samples(root_dir: str, limit_bytes: int = 80000) -> dict:
+	return scan_project(root_dir, limit_bytes, quality_checks=False)[0]
 
 
 def naive_quality_checks(root_dir: str) -> list[str]:
-	issues = []
-	for p in Path(root_dir).rglob('*'):
-		if p.is_file():
-			if p.suffix.lower() in {'.py'}:
-				try:
-					code = p.read_text(encoding='utf-8', errors='ignore')
-					if 'print(' in code and 'if __name__' not in code:
-						issues.append(f'Possible stray prints in {p.name}')
-				except Exception:
-					pass
-	return issues
+	return scan_project(root_dir, limit_bytes=0)[1]
 
 
 def run_autotests(root_dir: str, suite: dict) -> dict:
 	root = Path(root_dir)
+	tests = suite.get('tests', []) or []
+	# each target file is read once, however many tests inspect it
+	read_paths = sorted({t.get('path') or '' for t in tests if t.get('type') in ('file_contains', 'grep_count')})
+	with ThreadPoolExecutor(max_workers=8) as ex:
+		contents = dict(zip(read_paths, ex.map(lambda rel: try_read_text(root / rel), read_paths)))
 	results = []
-	for t in suite.get('tests', []) or []:
+	for t in tests:
 		type_ = t.get('type')
 		ok = False
 		detail = ''
@@ -53,19 +131,17 @@ def run_autotests(root_dir: str, suite: dict) -> dict:
 			ok = len(matches) > 0
 			detail = ','.join(matches[:5])
 		elif type_ == 'file_contains':
-			p = root / (t.get('path') or '')
-			try:
-				data = p.read_text(encoding='utf-8', errors='ignore')
+			data = contents[t.get('path') or '']
+			if data is not None:
 				ok = (t.get('pattern') or '') in data
 				detail = f"found={ok}"
-			except Exception:
-				ok = False
 		elif type_ == 'grep_count':
-			p = root / (t.get('path') or '')
+			data = contents[t.get('path') or '']
 			count_min = int(t.get('count_min') or 1)
 			try:
-				data = p.read_text(encoding='utf-8', errors='ignore')
-				cnt = len(re.findall(t.get('pattern') or '', data))
+				pat = t.get('pattern') or ''
+				# literal patterns (no regex metacharacters) take the str.count fast path
+				cnt = data.count(pat) if not _RE_META.search(pat) else len(_cre(pat).findall(data))
 				ok = cnt >= count_min
 				detail = f"count={cnt}"
 			except Exception:
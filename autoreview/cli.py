@@ -1,11 +1,12 @@
 import os
 import json
+import asyncio
 import argparse
 from pathlib import Path
 from tqdm import tqdm
 
 from .parsers import read_html, parse_project_description, parse_checklist, extract_zip, project_overview
-from .analyzer import collect_text_samples, naive_quality_checks
+from .analyzer import scan_project
 from .yandex_client import YandexGPTClient
 from .graph import build_graph
 
@@ -71,8 +72,7 @@ def main():
 	extract_zip(args.zip_path, str(extract_dir))
 
 	overview = project_overview(str(extract_dir))
-	samples = collect_text_samples(str(extract_dir))
-	issues = naive_quality_checks(str(extract_dir))
+	samples, issues = scan_project(str(extract_dir))
 
 	state = {
 		'project_meta': meta,
@@ -85,7 +85,7 @@ def main():
 	client = YandexGPTClient()
 	graph = build_graph(client)
 
-	result = graph.invoke(state)
+	result = asyncio.run(graph.ainvoke(state))
 
 	# persist json
 	Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
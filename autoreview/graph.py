@@ -1,12 +1,17 @@
 from langgraph.graph import StateGraph, END
 from typing import TypedDict
 import json
+import asyncio
+from itertools import islice
 
 from .yandex_client import YandexGPTClient
-from .prompts import EXTRACTOR_SYSTEM_PROMPT, REVIEWER_SYSTEM_PROMPT, VALIDATOR_SYSTEM_PROMPT, AUTOTEST_EXTRACTOR_PROMPT, RULE_CHECKER_PROMPT, REVIEW_FILTER_PROMPT
+from .prompts import EXTRACTOR_SYSTEM_PROMPT, EXTRACTOR_COMBINED_PROMPT, REVIEWER_SYSTEM_PROMPT, VALIDATOR_SYSTEM_PROMPT, AUTOTEST_EXTRACTOR_PROMPT, RULE_CHECKER_PROMPT, REVIEW_FILTER_PROMPT, REVIEW_FILTER_BATCH_PROMPT
 from .analyzer import run_autotests
-from .indexer import CodeIndex
-from .aggregator import dedupe_and_group
+from .indexer import CodeIndex, merge_chunks
+from .aggregator import dedupe_and_group, dedupe_findings
+
+
+FILTER_BATCH_SIZE = 10
 
 
 class ReviewState(TypedDict, total=False):
@@ -27,35 +32,58 @@ class ReviewState(TypedDict, total=False):
 	rule_issues: list[dict]
 
 
+def project_brief(state: ReviewState) -> str:
+	# the description + checklist block shared by every extractor prompt
+	meta = state.get('project_meta') or {}
+	check = state.get('checklist') or {}
+	return (
+		f"Описание проекта:\n{meta.get('title', '')}\n\n{meta.get('content', '')}\n\n"
+		f"Чеклист (пункты):\n- " + '\n- '.join(check.get('items', []))
+	)
+
+
 def build_graph(client: YandexGPTClient):
 	g = StateGraph(ReviewState)
+	# LangGraph drops anything not returned from a node, so the index is handed over here, keyed by root
+	built_indexes: dict[str, CodeIndex] = {}
 
-	def extract_requirements(state: ReviewState):
-		meta = state.get('project_meta') or {}
-		check = state.get('checklist') or {}
-		prompt = (
-			f"{EXTRACTOR_SYSTEM_PROMPT}\n\n"
-			f"Описание проекта:\n{meta.get('title', '')}\n\n{meta.get('content', '')}\n\n"
-			f"Чеклист (пункты):\n- " + '\n- '.join(check.get('items', []))
-		)
-		text = client.complete(prompt)
+	async def extract_requirements(brief: str):
+		prompt = f"{EXTRACTOR_SYSTEM_PROMPT}\n\n{brief}"
+		text = await client.acomplete(prompt)
 		return {'requirements': text}
 
-	def extract_autotests(state: ReviewState):
-		meta = state.get('project_meta') or {}
-		check = state.get('checklist') or {}
-		prompt = (
-			f"{AUTOTEST_EXTRACTOR_PROMPT}\n\n"
-			f"Описание проекта:\n{meta.get('title', '')}\n\n{meta.get('content', '')}\n\n"
-			f"Чеклист (пункты):\n- " + '\n- '.join(check.get('items', []))
-		)
-		text = client.complete(prompt)
+	async def extract_autotests(brief: str):
+		prompt = f"{AUTOTEST_EXTRACTOR_PROMPT}\n\n{brief}"
+		text = await client.acomplete(prompt)
 		try:
 			obj = json.loads(text)
 		except Exception:
 			obj = {'tests': []}
 		return {'autotests': obj}
 
+	async def extract_all(brief: str) -> dict | None:
+		prompt = f"{EXTRACTOR_COMBINED_PROMPT}\n\n{brief}"
+		text = await client.acomplete(prompt)
+		try:
+			obj = json.loads(text)
+		except Exception:
+			return None
+		if not isinstance(obj, dict) or not isinstance(obj.get('autotests'), dict) or not obj.get('requirements'):
+			return None
+		reqs = obj['requirements']
+		if not isinstance(reqs, str):
+			reqs = json.dumps(reqs, ensure_ascii=False, indent=2)
+		return {'requirements': reqs, 'autotests': obj['autotests']}
+
+	async def initial_extract(state: ReviewState):
+		# one round-trip for both extractions; the separate prompts are the fallback
+		brief = project_brief(state)
+		combined = await extract_all(brief)
+		if combined is not None:
+			return combined
+		reqs, autos = await asyncio.gather(extract_requirements(brief), extract_autotests(brief))
+		return {**reqs, **autos}
+
 	def run_tests(state: ReviewState):
 		root = (state.get('project_overview') or {}).get('root')
 		if not root:
@@ -68,64 +96,98 @@ def build_graph(client: YandexGPTClient):
 			return {'index_ready': False}
 		idx = CodeIndex(root)
 		idx.build()
-		state['_index'] = idx  # memoize in state (not serialized)
+		built_indexes[root] = idx
 		return {'index_ready': True}
 
 	def prepare_per_rule_context(state: ReviewState):
-		idx: CodeIndex = state.get('_index')  # type: ignore
+		root = (state.get('project_overview') or {}).get('root')
+		idx: CodeIndex | None = built_indexes.pop(root, None) if root else None
 		check = state.get('checklist') or {}
 		contexts = []
-		for item in check.get('items', [])[:50]:
+		seen: set[str] = set()
+		for item in check.get('items', []):
+			# repeated checklist items would send identical rule-checker prompts; dedupe before the cap
+			if len(contexts) >= 50:
+				break
+			norm = ' '.join(item.lower().split())
+			if norm in seen:
+				continue
+			seen.add(norm)
 			query = item
-			chunks = idx.retrieve(query, top_k=8) if idx else []
+			chunks = merge_chunks(idx.retrieve(query, top_k=8)) if idx else []
 			contexts.append({'rule': item, 'chunks': chunks})
 		return {'per_rule_context': contexts}
 
-	def rule_checkers(state: ReviewState):
+	async def check_rule(ctx: dict) -> list:
+		rule = ctx.get('rule')
+		chunks = ctx.get('chunks') or []
+		payload = []
+		for c in chunks:
+			payload.append(f"FILE: {c.get('file')}\nLINES: {c.get('lines')}\n{c.get('text')}")
+		prompt = (
+			f"{RULE_CHECKER_PROMPT}\n\n"
+			f"Правило чек-листа: {rule}\n\n"
+			f"Контекст кода:\n\n" + '\n\n---\n\n'.join(payload)
+		)
+		text = await client.acomplete(prompt)
+		try:
+			arr = json.loads(text)
+		except Exception:
+			arr = []
+		return arr
+
+	async def rule_checkers(state: ReviewState):
 		contexts = state.get('per_rule_context') or []
 		findings: list[dict] = []
-		for ctx in contexts:
-			rule = ctx.get('rule')
-			chunks = ctx.get('chunks') or []
-			payload = []
-			for c in chunks:
-				payload.append(f"FILE: {c.get('file')}\nLINES: {c.get('lines')}\n{c.get('text')}")
-			prompt = (
-				f"{RULE_CHECKER_PROMPT}\n\n"
-				f"Правило чек-листа: {rule}\n\n"
-				f"Контекст кода:\n\n" + '\n\n---\n\n'.join(payload)
-			)
-			text = client.complete(prompt)
-			try:
-				arr = json.loads(text)
-			except Exception:
-				arr = []
+		for arr in await asyncio.gather(*(check_rule(ctx) for ctx in contexts)):
 			for it in arr:
 				if it:
 					findings.append(it)
 		return {'rule_issues_raw': findings}
 
-	def review_filter(state: ReviewState):
-		raw = state.get('rule_issues_raw') or []
-		kept: list[dict] = []
-		for it in raw:
-			prompt = (
-				f"{REVIEW_FILTER_PROMPT}\n\n"
-				f"Замечание: {json.dumps(it, ensure_ascii=False)}"
-			)
-			text = client.complete(prompt)
-			try:
-				obj = json.loads(text)
-			except Exception:
-				obj = {'keep': True, 'reason': 'offline'}
-			if obj.get('keep'):
-				kept.append(it)
+	async def keep_issue(it: dict) -> bool:
+		prompt = (
+			f"{REVIEW_FILTER_PROMPT}\n\n"
+			f"Замечание: {json.dumps(it, ensure_ascii=False)}"
+		)
+		text = await client.acomplete(prompt)
+		try:
+			obj = json.loads(text)
+		except Exception:
+			obj = {'keep': True, 'reason': 'offline'}
+		return bool(obj.get('keep'))
+
+	async def keep_batch(items: list[dict]) -> list[bool]:
+		# one round-trip decides a whole batch; per-item prompts only if the reply doesn't line up
+		prompt = (
+			f"{REVIEW_FILTER_BATCH_PROMPT}\n\n"
+			f"Замечания: {json.dumps([{**it, 'n': i} for i, it in enumerate(items, 1)], ensure_ascii=False)}"
+		)
+		text = await client.acomplete(prompt)
+		try:
+			arr = json.loads(text)
+		except Exception:
+			arr = None
+		if isinstance(arr, list) and len(arr) == len(items) and all(isinstance(x, dict) for x in arr):
+			# replies are matched by their n when the model echoes every number, otherwise by position
+			by_n = {x['n']: x for x in arr if type(x.get('n')) is int}
+			if all(i in by_n for i in range(1, len(items) + 1)):
+				arr = [by_n[i] for i in range(1, len(items) + 1)]
+			return [bool(x.get('keep')) for x in arr]
+		return list(await asyncio.gather(*(keep_issue(it) for it in items)))
+
+	async def review_filter(state: ReviewState):
+		# findings that aggregate() would collapse anyway are filtered only once
+		raw = dedupe_findings(state.get('rule_issues_raw') or [])
+		batches = [raw[i:i + FILTER_BATCH_SIZE] for i in range(0, len(raw), FILTER_BATCH_SIZE)]
+		flags = [f for batch in await asyncio.gather(*(keep_batch(b) for b in batches)) for f in batch]
+		kept: list[dict] = [it for it, keep in zip(raw, flags) if keep]
 		return {'rule_issues_filtered': kept}
 
 	def aggregate(state: ReviewState):
 		return {'rule_issues': dedupe_and_group(state.get('rule_issues_filtered') or [])}
 
-	def review_project(state: ReviewState):
+	async def review_project(state: ReviewState):
 		reqs = state.get('requirements', '')
 		overview = state.get('project_overview', {})
 		samples = state.get('project_samples', {})
@@ -135,14 +197,14 @@ def build_graph(client: YandexGPTClient):
 			f"Требования и критерии:\n{reqs}\n\n"
 			f"Структура проекта:\n{overview}\n\n"
 			f"Фрагменты файлов (усечено):\n" + '\n\n'.join(
-				f"### {name}\n{content[:2000]}" for name, content in list(samples.items())[:20]
+				f"### {name}\n{content[:2000]}" for name, content in islice(samples.items(), 20)
 			)
 			+ ("\n\nПредварительно найденные проблемы:\n- " + '\n- '.join(issues) if issues else '')
 		)
-		text = client.complete(prompt)
+		text = await client.acomplete(prompt)
 		return {'review': text}
 
-	def validate(state: ReviewState):
+	async def validate(state: ReviewState):
 		reqs = state.get('requirements', '')
 		review = state.get('review', '')
 		results = state.get('autotest_results', {})
@@ -152,11 +214,10 @@ def build_graph(client: YandexGPTClient):
 			f"Отчет ревьюера:\n{review}\n\n"
 			f"Результаты автотестов (JSON):\n{json.dumps(results, ensure_ascii=False)}"
 		)
-		text = client.complete(prompt)
+		text = await client.acomplete(prompt)
 		return {'validation': text}
 
-	g.add_node('extract_requirements', extract_requirements)
-	g.add_node('extract_autotests', extract_autotests)
+	g.add_node('initial_extract', initial_extract)
 	g.add_node('run_tests', run_tests)
 	g.add_node('build_index', build_index)
 	g.add_node('prepare_per_rule_context', prepare_per_rule_context)
@@ -166,9 +227,8 @@ def build_graph(client: YandexGPTClient):
 	g.add_node('review_project', review_project)
 	g.add_node('validate', validate)
 
-	g.set_entry_point('extract_requirements')
-	g.add_edge('extract_requirements', 'extract_autotests')
-	g.add_edge('extract_autotests', 'run_tests')
+	g.set_entry_point('initial_extract')
+	g.add_edge('initial_extract', 'run_tests')
 	g.add_edge('run_tests', 'build_index')
 	g.add_edge('build_index', 'prepare_per_rule_context')
 	g.add_edge('prepare_per_rule_context', 'rule_checkers')
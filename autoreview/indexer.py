@@ -1,7 +1,22 @@
 import os
 import re
+import heapq
+import hashlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from .analyzer import try_read_text, walk_files, file_ext
+
+
+_RE_TOKEN = re.compile(r'[A-Za-zА-Яа-я0-9_\-]{3,}')
+
+
+INDEX_EXTS = frozenset({
+	'py', 'js', 'jsx', 'ts', 'tsx', 'md', 'txt', 'html', 'htm', 'css', 'scss', 'json', 'yaml', 'yml',
+	'go', 'rs', 'java', 'kt', 'c', 'h', 'cpp', 'hpp', 'cs', 'php', 'rb', 'sh', 'sql', 'vue',
+})
+
 
 class CodeChunk(dict):
 	pass
@@ -11,33 +26,52 @@ class CodeIndex:
 	def __init__(self, root_dir: str):
 		self.root_dir = str(Path(root_dir).resolve())
 		self.chunks: list[CodeChunk] = []
+		self._postings: dict[str, list[tuple[int, int]]] = {}
 		self._bm25 = None
 
-	def build(self, max_file_bytes: int = 200_000, chunk_size: int = 400, overlap: int = 50) -> None:
-		root = Path(self.root_dir)
-		ex_c = {'.png', '.jpg', '.jpeg', '.gif', '.pdf', '.zip', '.lock', '.ico', '.ttf', '.woff', '.woff2'}
-		for p in sorted(root.rglob('*')):
-			if not p.is_file() or p.suffix.lower() in ex_c:
+	def build(self, max_file_bytes: int = 200_000, chunk_size: int = 400, overlap: int = 50, max_chunks_per_file: int = 50) -> None:
+		files = []
+		for rel, e in walk_files(self.root_dir):
+			if file_ext(e.name) not in INDEX_EXTS:
 				continue
+			# size comes from the dirent walk, so empty and oversized files are never opened
 			try:
-				text = p.read_text(encoding='utf-8', errors='ignore')
-			except Exception:
+				size = e.stat().st_size
+			except OSError:
+				continue
+			if 0 < size <= max_file_bytes * 4:
+				files.append((rel, e.path))
+		paths = [path for _, path in files]
+		# reads block in syscalls that release the GIL, so overlap them; chunking stays sequential
+		with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+			texts = list(ex.map(try_read_text, paths))
+		step = max(1, chunk_size - overlap)
+		seen: set[bytes] = set()
+		for (rel, _), text in zip(files, texts):
+			if text is None:
 				continue
 			if len(text) > max_file_bytes:
 				text = text[:max_file_bytes]
+			# vendored/copied files would only crowd retrieval with identical chunks
+			digest = hashlib.blake2b(text.encode('utf-8', errors='surrogateescape'), digest_size=16).digest()
+			if digest in seen:
+				continue
+			seen.add(digest)
 			lines = text.splitlines()
-			start = 0
-			while start < len(lines):
+			for start in range(0, len(lines), step)[:max_chunks_per_file]:
 				end = min(len(lines), start + chunk_size)
 				snippet = '\n'.join(lines[start:end])
 				self.chunks.append(CodeChunk({
-					'file': str(p.relative_to(root)),
+					'file': rel,
 					'lines': [start + 1, end],
 					'text': snippet,
 				}))
-				start = end - overlap
-				if start < 0:
-					start = 0
+				if end == len(lines):
+					break
+
+		for cid, c in enumerate(self.chunks):
+			for tok, cnt in Counter(_RE_TOKEN.findall(c['text'].lower())).items():
+				self._postings.setdefault(tok, []).append((cid, cnt))
 
 		try:
 			from llama_index.core import SimpleDirectoryReader
@@ -62,12 +96,38 @@ class CodeIndex:
 				return hits
 			except Exception:
 				pass
-		tokens = set(re.findall(r'[A-Za-zА-Яа-я0-9_\-]{3,}', query.lower()))
-		scored = []
-		for c in self.chunks:
-			text_l = c['text'].lower()
-			score = sum(text_l.count(t) for t in tokens)
-			if score:
-				scored.append((score, c))
-		scored.sort(key=lambda x: x[0], reverse=True)
-		return [c for _, c in scored[:top_k]]
+		scores: dict[int, int] = {}
+		for t in set(_RE_TOKEN.findall(query.lower())):
+			for cid, cnt in self._postings.get(t, ()):
+				scores[cid] = scores.get(cid, 0) + cnt
+		top = heapq.nlargest(top_k, scores.items(), key=lambda x: (x[1], -x[0]))
+		return [self.chunks[cid] for cid, _ in top]
+
+
+def merge_chunks(chunks: list[CodeChunk]) -> list[CodeChunk]:
+	# neighbouring windows overlap by design; merging them keeps the shared lines out of the prompt twice
+	groups: dict[str, list[CodeChunk]] = {}
+	out: list[CodeChunk] = []
+	for c in chunks:
+		lines = c.get('lines')
+		if not (isinstance(lines, (list, tuple)) and len(lines) == 2 and c.get('file')):
+			out.append(c)
+			continue
+		groups.setdefault(c['file'], []).append(c)
+	for file, group in groups.items():
+		group.sort(key=lambda c: c['lines'][0])
+		cur = group[0]
+		for nxt in group[1:]:
+			start, end = cur['lines']
+			nstart, nend = nxt['lines']
+			cur_lines = cur['text'].split('\n')
+			nxt_lines = nxt['text'].split('\n')
+			if nstart <= end + 1 and len(cur_lines) == end - start + 1 and len(nxt_lines) == nend - nstart + 1:
+				if nend > end:
+					cur = CodeChunk({'file': file, 'lines': [start, nend], 'text': '\n'.join(cur_lines + nxt_lines[end - nstart + 1:])})
+				continue
+			out.append(cur)
+			cur = nxt
+		out.append(cur)
+	return out
+
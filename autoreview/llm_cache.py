@@ -0,0 +1,94 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# per-user location: completions can contain project code, so not the shared temp dir
+DEFAULT_CACHE_PATH = os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'autoreview', 'llm_cache.sqlite')
+
+
+# in-process LRU of completions, backed by an optional size- and TTL-bounded sqlite file so hits survive restarts
+class LLMCache:
+	def __init__(self, path: str | None = None, max_entries: int = 256, ttl: float = 24 * 3600, max_disk_entries: int = 4096):
+		self.max_entries = max_entries
+		self.max_disk_entries = max_disk_entries
+		self.ttl = ttl
+		self._mem: OrderedDict[str, tuple[float, str]] = OrderedDict()
+		self._lock = threading.Lock()
+		# the sqlite file is opened on first use, so clients that never cache never touch the disk
+		self._path = path if path and max_entries > 0 and max_disk_entries > 0 else None
+		self._db = None
+
+	def _conn(self) -> sqlite3.Connection | None:
+		if self._db is None and self._path:
+			path, self._path = self._path, None
+			try:
+				os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+				# owner-only before sqlite opens it; the -wal/-shm files inherit these permissions
+				os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+				os.chmod(path, 0o600)
+				db = sqlite3.connect(path, check_same_thread=False)
+				db.execute('PRAGMA journal_mode=WAL')
+				db.execute('CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, created REAL, text TEXT)')
+				db.execute('CREATE INDEX IF NOT EXISTS completions_created ON completions (created)')
+				db.commit()
+				self._db = db
+			except (OSError, sqlite3.Error) as e:
+				logger.warning('LLM cache at %s disabled: %s', path, e)
+		return self._db
+
+	@staticmethod
+	def make_key(endpoint: str, model_uri: str, temperature: float, max_tokens: int, prompt: str) -> str:
+		raw = f'{endpoint}\x00{model_uri}\x00{round(temperature, 3)}\x00{max_tokens}\x00{prompt}'.encode('utf-8')
+		return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+	def get(self, key: str) -> str | None:
+		now = time.time()
+		with self._lock:
+			hit = self._mem.get(key)
+			if hit is not None and now - hit[0] < self.ttl:
+				self._mem.move_to_end(key)
+				return hit[1]
+			db = self._conn()
+			if db is None:
+				return None
+			try:
+				row = db.execute('SELECT created, text FROM completions WHERE key = ?', (key,)).fetchone()
+			except sqlite3.Error:
+				return None
+			if row is None or now - row[0] >= self.ttl:
+				return None
+			self._store_mem(key, row[0], row[1])
+			return row[1]
+
+	def put(self, key: str, text: str) -> None:
+		if self.max_entries <= 0:
+			return
+		now = time.time()
+		with self._lock:
+			self._store_mem(key, now, text)
+			db = self._conn()
+			if db is None:
+				return
+			try:
+				db.execute('INSERT OR REPLACE INTO completions (key, created, text) VALUES (?, ?, ?)', (key, now, text))
+				# both prunes walk the created index: expired rows, then the oldest beyond max_disk_entries
+				db.execute('DELETE FROM completions WHERE created < ?', (now - self.ttl,))
+				db.execute(
+					'DELETE FROM completions WHERE key IN (SELECT key FROM completions ORDER BY created DESC LIMIT -1 OFFSET ?)',
+					(self.max_disk_entries,),
+				)
+				db.commit()
+			except sqlite3.Error as e:
+				logger.warning('LLM cache write failed: %s', e)
+
+	def _store_mem(self, key: str, created: float, text: str) -> None:
+		self._mem[key] = (created, text)
+		self._mem.move_to_end(key)
+		while len(self._mem) > self.max_entries:
+			self._mem.popitem(last=False)
@@ -1,7 +1,11 @@
 import re
+import shutil
 import zipfile
 from pathlib import Path
-from bs4 import BeautifulSoup
+import lxml.etree
+import lxml.html
+
+from .analyzer import SKIP_DIRS
 
 
 def read_html(path: str) -> str:
@@ -9,11 +13,38 @@ def read_html(path: str) -> str:
 	return p.read_text(encoding='utf-8', errors='ignore')
 
 
+_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+
+def _parse(html_text: str):
+	if not html_text.strip():
+		return None
+	try:
+		return lxml.html.document_fromstring(html_text.encode('utf-8'), parser=_HTML_PARSER)
+	except lxml.etree.ParserError:
+		# doctype/comment-only input has no elements; treat it like an empty page
+		return None
+
+
+# BeautifulSoup get_text leaves out script/style/template strings as well as comments
+_TEXT_XPATH = lxml.etree.XPath('.//text()[not(ancestor::script or ancestor::style or ancestor::template)]')
+
+
+def _text(el, sep: str = ' ') -> str:
+	# same as BeautifulSoup get_text(sep, strip=True)
+	return sep.join(t.strip() for t in _TEXT_XPATH(el) if t.strip())
+
+
+def _title(doc) -> str:
+	found = doc.xpath('//title') if doc is not None else []
+	return _text(found[0], '') if found else ''
+
+
 def parse_project_description(html_text: str) -> dict:
-	soup = BeautifulSoup(html_text, 'lxml')
-	title = soup.title.get_text(strip=True) if soup.title else ''
-	headers = [h.get_text(' ', strip=True) for h in soup.select('h1, h2, h3')]
-	paras = [p.get_text(' ', strip=True) for p in soup.select('p, li')]
+	doc = _parse(html_text)
+	title = _title(doc)
+	headers = [_text(h) for h in doc.xpath('//h1 | //h2 | //h3')] if doc is not None else []
+	paras = [_text(p) for p in doc.xpath('//p | //li')] if doc is not None else []
 	return {
 		'title': title,
 		'headers': headers,
@@ -22,21 +53,51 @@ def parse_project_description(html_text: str) -> dict:
 
 
 def parse_checklist(html_text: str) -> dict:
-	soup = BeautifulSoup(html_text, 'lxml')
-	title = soup.title.get_text(strip=True) if soup.title else ''
+	doc = _parse(html_text)
+	title = _title(doc)
 	items = []
-	for li in soup.select('li'):
-		text = li.get_text(' ', strip=True)
+	for li in (doc.xpath('//li') if doc is not None else []):
+		text = _text(li)
 		if text:
 			items.append(text)
 	return {'title': title, 'items': items}
 
 
+COPY_BUFSIZE = 1 << 18
+
+# trees nothing downstream reads; other files (images included) stay for file_exists checks
+EXTRACT_SKIP_DIRS = SKIP_DIRS
+MAX_EXTRACT_BYTES = 2 << 30
+
+
+def _member_path(out: Path, name: str) -> Path:
+	# same sanitising as ZipFile.extract: drop absolute prefixes, '.' and '..'
+	parts = [x for x in name.split('/') if x not in ('', '.', '..')]
+	return out.joinpath(*parts)
+
+
 def extract_zip(zip_path: str, out_dir: str) -> str:
 	out = Path(out_dir)
 	out.mkdir(parents=True, exist_ok=True)
 	with zipfile.ZipFile(zip_path, 'r') as zf:
-		zf.extractall(out)
+		# ZipExtFile never yields more than file_size, so the declared total bounds what gets written
+		total = sum(zi.file_size for zi in zf.infolist())
+		if total > MAX_EXTRACT_BYTES:
+			raise ValueError(f'{zip_path}: uncompressed size {total} exceeds {MAX_EXTRACT_BYTES} bytes')
+		for zi in zf.infolist():
+			dst = _member_path(out, zi.filename)
+			if dst == out:
+				continue
+			parts = dst.relative_to(out).parts
+			if not EXTRACT_SKIP_DIRS.isdisjoint(parts if zi.is_dir() else parts[:-1]):
+				continue
+			if zi.is_dir():
+				dst.mkdir(parents=True, exist_ok=True)
+				continue
+			dst.parent.mkdir(parents=True, exist_ok=True)
+			# 256 KB copies instead of the 8 KB default used by extractall
+			with zf.open(zi, 'r') as src, open(dst, 'wb', buffering=0) as fout:
+				shutil.copyfileobj(src, fout, COPY_BUFSIZE)
 	return str(out)
 
 
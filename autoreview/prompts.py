@@ -10,6 +10,15 @@ AUTOTEST_EXTRACTOR_PROMPT = (
 	'Подбирай тесты по чеклисту и описанию. Возвращай ЧИСТЫЙ JSON, без комментариев и текста.'
 )
 
+EXTRACTOR_COMBINED_PROMPT = (
+	'Ты помощник-экстрактор. По описанию проекта и чеклисту выполни две задачи за один ответ. '
+	'1) Выдели требования, ограничения, критерии приемки и запреты в разделах: Требования, Критерии, Запреты, Технологии. '
+	'2) Сформируй минимальный набор атомарных автотестов для первичной проверки проекта по схеме: '
+	'{"tests": [{"id": "string", "type": "file_exists|glob_exists|file_contains|grep_count", '
+	'"path": "string?", "glob": "string?", "pattern": "string?", "count_min": "int?", "explanation": "string"}]}. '
+	'Верни ЧИСТЫЙ JSON без комментариев и текста: {"requirements": "string", "autotests": {"tests": [...]}}.'
+)
+
 RULE_CHECKER_PROMPT = (
 	'Ты RuleChecker. У тебя есть правило чек-листа и релевантные фрагменты кода. '
 	'Проанализируй и верни ЧИСТЫЙ JSON массива объектов: '
@@ -23,6 +32,12 @@ REVIEW_FILTER_PROMPT = (
 	'Отклоняй дубликаты, спам и нерелевантные выводы.'
 )
 
+REVIEW_FILTER_BATCH_PROMPT = (
+	'Ты ReviewFilter. На вход пронумерованный JSON-массив замечаний {n, file, lines, rule, description, suggestion}. '
+	'Для каждого замечания по порядку верни ЧИСТЫЙ JSON-массив той же длины: [{"n": int, "keep": true|false, "reason": "str"}], n — номер замечания. '
+	'Отклоняй дубликаты, спам и нерелевантные выводы.'
+)
+
 REVIEWER_SYSTEM_PROMPT = (
 	'Ты ревьюер. У тебя есть набор требований и код проекта. '
 	'Проведи первичную проверку на работоспособность и соответствие минимальным критериям. '
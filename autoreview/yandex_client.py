@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 import time
 import logging
 import urllib3
@@ -7,18 +8,43 @@ import urllib3
 from io import BytesIO
 from dotenv import load_dotenv
 
+from .llm_cache import LLMCache, DEFAULT_CACHE_PATH
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+CACHE_MAX_TEMPERATURE = 0.5
+
+
+RETRY_WAIT_MAX = 10.0
+
+
+class _BoundedRetry(urllib3.Retry):
+	# Retry-After is honoured, but never for longer than RETRY_WAIT_MAX
+	def get_retry_after(self, response):
+		after = super().get_retry_after(response)
+		return None if after is None else min(after, RETRY_WAIT_MAX)
+
 
 class YandexGPTClient:
-	def __init__(self, api_key: str = None, folder_id: str = None, model: str = None, endpoint: str = None):
+	def __init__(self, api_key: str = None, folder_id: str = None, model: str = None, endpoint: str = None, max_concurrency: int = 8, cache_size: int = 256, cache_path: str = None):
 		self.api_key = api_key or os.getenv('YANDEX_API_KEY')
 		self.folder_id = folder_id or os.getenv('YANDEX_FOLDER_ID')
 		self.model = model or os.getenv('YANDEX_GPT_MODEL', 'yandexgpt-lite')
 		self.endpoint = endpoint or os.getenv('YANDEX_GPT_ENDPOINT', 'https://llm.api.cloud.yandex.net/foundationModels/v1/completion')
-		self.http = urllib3.PoolManager()
+		# keep one warm keep-alive connection per concurrent request instead of urllib3's default of 1
+		self.http = urllib3.PoolManager(
+			maxsize=max_concurrency,
+			# read=0: a POST that timed out may already be generated and billed, so only connect errors and these statuses retry
+			retries=_BoundedRetry(total=2, read=0, backoff_factor=0.3, backoff_max=RETRY_WAIT_MAX, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=None, raise_on_status=False),
+		)
+		self.max_concurrency = max_concurrency
+		# asyncio primitives bind to the loop that first waits on them, so the semaphore is made per loop
+		self._slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+		# YANDEX_GPT_CACHE_PATH='' keeps the cache in memory only
+		path = cache_path if cache_path is not None else os.getenv('YANDEX_GPT_CACHE_PATH', DEFAULT_CACHE_PATH)
+		self.cache = LLMCache(path or None, max_entries=cache_size)
 
 	def _headers(self) -> dict:
 		return {
@@ -26,6 +52,9 @@ class YandexGPTClient:
 			'Content-Type': 'application/json',
 		}
 
+	def _model_uri(self) -> str:
+		return f'gpt://{self.folder_id}/{self.model}'
+
 	def is_configured(self) -> bool:
 		return bool(self.api_key and self.folder_id)
 
@@ -33,8 +62,14 @@ class YandexGPTClient:
 		if not self.is_configured():
 			return self._offline_reply(prompt)
 
+		# high-temperature calls ask for a fresh sample, so they bypass the cache
+		key = LLMCache.make_key(self.endpoint, self._model_uri(), temperature, max_tokens, prompt) if temperature <= CACHE_MAX_TEMPERATURE else None
+		cached = self.cache.get(key) if key else None
+		if cached is not None:
+			return cached
+
 		payload = {
-			'modelUri': f'gpt://{self.folder_id}/{self.model}',
+			'modelUri': self._model_uri(),
 			'completionOptions': {
 				'temperature': temperature,
 				'maxTokens': max_tokens,
@@ -54,11 +89,24 @@ class YandexGPTClient:
 			choices = data.get('result', {}).get('alternatives') or []
 			if not choices:
 				return self._offline_reply(prompt)
-			return choices[0].get('message', {}).get('text', '').strip() or self._offline_reply(prompt)
+			text = choices[0].get('message', {}).get('text', '').strip()
+			if not text:
+				return self._offline_reply(prompt)
+			if key:
+				self.cache.put(key, text)
+			return text
 		except Exception as e:
 			logger.exception('YandexGPT request failed: %s', e)
 			return self._offline_reply(prompt)
 
+	async def acomplete(self, prompt: str, temperature: float = 0.2, max_tokens: int = 1200) -> str:
+		# urllib3.PoolManager is thread-safe; the semaphore keeps in-flight calls within the pool size
+		loop = asyncio.get_running_loop()
+		if self._slots is None or self._slots[0] is not loop:
+			self._slots = (loop, asyncio.Semaphore(self.max_concurrency))
+		async with self._slots[1]:
+			return await asyncio.to_thread(self.complete, prompt, temperature, max_tokens)
+
 	def _offline_reply(self, prompt: str) -> str:
 		prefix = '[OFFLINE DUMMY]'
 		return f"{prefix} {prompt[:400]}\n\n(summary unavailable; configure YANDEX_API_KEY and YANDEX_FOLDER_ID)"